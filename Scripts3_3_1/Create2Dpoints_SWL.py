@@ -23,6 +23,8 @@ import arcpy
 import os
 import sys
 import datetime
+import functools
+import numpy as np
 
 #%% 2 Define functions
 
@@ -43,10 +45,55 @@ def printerror(message):
     else:
         print(message)
 
+# Define field name lookup, cached so each dataset's fields are only listed once.
+# Only use on datasets whose fields are not changed after the first lookup.
+
+@functools.lru_cache(maxsize=None)
+def _field_name_set(dataset):
+    return frozenset(field.name for field in arcpy.ListFields(dataset))
+
+# Define near point function
+# For each well (x, y arrays) find the closest point on a polyline (array of x, y vertices).
+# Returns near x, near y, distance from well to line, and distance along line to near point.
+
+def near_point_on_line(vertices, x, y):
+    seg_start = vertices[:-1]
+    seg = vertices[1:] - seg_start
+    seg_len = np.hypot(seg[:, 0], seg[:, 1])
+    cum_len = np.concatenate(([0], np.cumsum(seg_len)))
+    # Projection of each well (rows) onto each segment (columns), clipped to the segment ends
+    dx = x[:, None] - seg_start[:, 0]
+    dy = y[:, None] - seg_start[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (dx * seg[:, 0] + dy * seg[:, 1]) / seg_len**2
+    t = np.clip(np.nan_to_num(t), 0, 1) #zero length segments project to their start point
+    px = seg_start[:, 0] + t * seg[:, 0]
+    py = seg_start[:, 1] + t * seg[:, 1]
+    # Keep the segment with the minimum distance to each well
+    dist = np.hypot(x[:, None] - px, y[:, None] - py)
+    nearest = np.argmin(dist, axis=1)
+    rows = np.arange(len(x))
+    measure = cum_len[nearest] + t[rows, nearest] * seg_len[nearest]
+    return px[rows, nearest], py[rows, nearest], dist[rows, nearest], measure
+
+# Define line end extension function
+# Moves an end vertex (x, y array) out by distance, in the direction from the nearest
+# distinct vertex in others (rows of x, y, nearest first) to the end vertex.
+# Returns None if every vertex is at the end vertex (zero length line).
+
+def extended_end_point(end, others, distance):
+    offsets = end - others
+    lengths = np.hypot(offsets[:, 0], offsets[:, 1])
+    distinct = np.flatnonzero(lengths > 0)
+    if len(distinct) == 0:
+        return None
+    nearest = distinct[0]
+    return end + offsets[nearest] / lengths[nearest] * distance
+
 # Define field exists function
 
 def FieldExists(dataset, field_name):
-    if field_name in [field.name for field in arcpy.ListFields(dataset)]:
+    if field_name in _field_name_set(dataset):
         return True
     else:
         printerror("Error: {0} field does not exist in {1}."
@@ -94,7 +141,7 @@ else:
 multipart = False
 with arcpy.da.SearchCursor(xsln_file_orig, ["SHAPE@"]) as cursor:
     for row in cursor:
-        if row[0].isMultipart:
+        if row[0].partCount > 1:
             multipart = True
             break
 if multipart:
@@ -135,50 +182,26 @@ if xsln_count == 0:
 #%% 7 Check that well point file, and cross section file match
 
 printit("Checking that well point file, and cross section line file all match.")
-# Create empty lists to store well IDs and et_ids in each file
-wwpt_wellid_list = []
-wwpt_etid_list = []
-xsln_etid_list = []
-
-# Populate well point file wellid, et_id, and well label lists
-with arcpy.da.SearchCursor(wwpt_file_orig, [wwpt_wellid_field, wwpt_etid_field]) as wwpt_records:
-    for row in wwpt_records:
-        wellid = row[0]
-        etid = row[1]
-        if wellid not in wwpt_wellid_list:
-            wwpt_wellid_list.append(wellid)
-        if etid not in wwpt_etid_list:
-            wwpt_etid_list.append(etid)
-
-# Populate cross section line et_id list
+# Read only the et_id column of each file into a set of unique et_ids, null et_ids are kept as None
+with arcpy.da.SearchCursor(wwpt_file_orig, [wwpt_etid_field]) as wwpt_records:
+    wwpt_etids = {row[0] for row in wwpt_records}
 with arcpy.da.SearchCursor(xsln_file_orig, [xsln_etid_field]) as xsln_records:
-    for line in xsln_records:
-        etid = line[0]
-        if etid not in xsln_etid_list:
-            xsln_etid_list.append(etid)
+    xsln_etids = {line[0] for line in xsln_records}
 
 # Check that et_id fields in well point file have matching xsln et_id
-listprint = []
-for etid in wwpt_etid_list:
-    if etid not in xsln_etid_list:
-        listprint.append(etid)
+listprint = sorted(wwpt_etids - xsln_etids, key=str)
 listprint_len = len(listprint)
 if listprint_len > 0:
         printit("Warning: there are {0} et_id's in well point file that do not match any et_id's in cross section line file. Well point et_id's are: {1}".format(listprint_len, listprint))
 
 # Check that all cross section lines have matching well points
-listprint = []
-for etid in xsln_etid_list:
-    if etid not in wwpt_etid_list:
-        listprint.append(etid)
+listprint = sorted(xsln_etids - wwpt_etids, key=str)
 listprint_len = len(listprint)
 if listprint_len > 0:
         printit("Warning: there are {0} cross section lines that do not have any associated well points. Cross section et_id's are: {1}".format(listprint_len, listprint))
 
 # Set boolean variable that stores data type of well id field (needed for defining Where Clause later)
-wellid_is_numeric = True
-if type(wwpt_wellid_list[0]) == str:
-    wellid_is_numeric = False
+wellid_is_numeric = arcpy.ListFields(wwpt_file_orig, wwpt_wellid_field)[0].type != 'String'
 
 # %% 8 List fields that are used in 2d point
 
@@ -199,36 +222,29 @@ fields_2d = [['distance', 'FLOAT'], ['pct_dist', 'FLOAT']]
 fields_2d_point = [['measuremt', 'DOUBLE'],['elevation', 'FLOAT'],['BUFF_DIST','DOUBLE'],['VE','DOUBLE'],['Data_Source','TEXT']]
 
 
-# %% 9 Create empty 2d point file, to show well locations in cross section space
+# %% 9 Set 2d point file path and fields, to show well locations in cross section space
 
 arcpy.env.overwriteOutput = True
 
-#create point shapefile
-printit("Creating empty 2d point file to show well locations.")
-arcpy.management.CreateFeatureclass(workspace, "swl_2d_xsecview", "POINT", '',
-                                    'DISABLED', 'DISABLED')
-
 #set point shapefile filepath variable
+# The point file is written in one pass from a numpy array in section 14,
+# so remove any existing output now (NumPyArrayToFeatureClass will not overwrite)
 pointfile = os.path.join(workspace, "swl_2d_xsecview")
+if arcpy.Exists(pointfile):
+    arcpy.management.Delete(pointfile)
 
 #define field names and types: base fields, 2d fields, and 2d point fields
-point_2d_fields = fields_base + fields_2d + fields_2d_point
+# leaving out fields only needed to build geometry, these are not written to the point file
+geometry_only_fields = ['x_coord', 'y_coord', 'x_coord_2d', 'y_coord_2d', 'distance', 'pct_dist']
+point_2d_fields = [newfield for newfield in fields_base + fields_2d + fields_2d_point
+                   if newfield[0] not in geometry_only_fields]
 
-#Add fields to 2D point file
-arcpy.management.AddFields(pointfile, point_2d_fields)
-
-#%% 10 Create feature dataset to store wwpt files by xs
-# wwpt files need to be split by xs to ensure that each well is referencing the correct xsln
-arcpy.env.overwriteOutput = True
-printit("Creating feature dataset for temporary file storage and copying well point file.")
-arcpy.management.CreateFeatureDataset(workspace, "wwpt_by_xs")
-wwpt_by_xs_fd = os.path.join(workspace, "wwpt_by_xs")
-
-
-# Make a temporary copy of the wwpt file and put it in the new feature dataset
-# Code below will grab selected features from this temporary wwpt file.
+#%% 10 Make a temporary copy of the wwpt file
+# Code below will populate cross section location fields in this temporary wwpt file.
 # The temporary file will be deleted when geometry is completed.
-wwpt_file_temp = os.path.join(wwpt_by_xs_fd, "wwpt_temp")
+arcpy.env.overwriteOutput = True
+printit("Copying well point file for temporary file storage.")
+wwpt_file_temp = os.path.join(workspace, "wwpt_temp")
 arcpy.management.CopyFeatures(wwpt_file_orig, wwpt_file_temp)
 
 #%% 11 Add fields to temporary wwpt point feature class
@@ -237,12 +253,14 @@ arcpy.management.CopyFeatures(wwpt_file_orig, wwpt_file_temp)
 wwpt_fields = [["NEAR_FID", "LONG"], ["NEAR_DIST", "DOUBLE"], ["NEAR_X", "DOUBLE"],
                ["NEAR_Y", "DOUBLE"], ["OnLine_DIST", "FLOAT"],["VE","DOUBLE"]]
 
+existing_fields = _field_name_set(wwpt_file_temp)
 for newfield in wwpt_fields:
-    if newfield[0] in [field.name for field in arcpy.ListFields(wwpt_file_temp)]:
+    if newfield[0] in existing_fields:
         printit("{0} field already exists in well point file. Tool will overwrite data in this field.".format(newfield[0]))
-    else:
-        printit("Adding {0} field to well point file.".format(newfield[0]))
-        arcpy.management.AddField(wwpt_file_temp, newfield[0], newfield[1])
+to_add = [newfield for newfield in wwpt_fields if newfield[0] not in existing_fields]
+if to_add:
+    printit("Adding {0} fields to well point file.".format(", ".join(newfield[0] for newfield in to_add)))
+    arcpy.management.AddFields(wwpt_file_temp, to_add)
 
 #%% 12 Create a temporary xsln file and extend the lines equal to buffer distance
     # The extended xsln file is used to define 2d x coordinates of wells
@@ -260,173 +278,184 @@ printit("Creating temporary xsln file to ensure wells beyond xsln endpoints plot
 # This is to ensure that near analysis function will find the correct point for
 # wells beyond the from and to nodes of the cross section line.
 
+new_xsln_rows = []
 with arcpy.da.SearchCursor(xsln_file_orig, ['SHAPE@', xsln_etid_field]) as xsln:
     for line in xsln:
         et_id = line[1]
-        geompointlist = []
-        # Fill geompoint list with list of vertices in the xsln as point geometry objects
-        for vertex in line[0].getPart(0): #for each vertex in array of point objects
-            point = arcpy.PointGeometry(arcpy.Point(vertex.X, vertex.Y))
-            geompointlist.append(point)
-        # Set variables to define first two points
-        beg_pt = geompointlist[0]
-        beg_pt2 = geompointlist[1]
-        # Calculate angle of beginning line segment from second point to beginning
-        beg_angle_and_dist = beg_pt2.angleAndDistanceTo(beg_pt, "PLANAR")
-        beg_angle = beg_angle_and_dist[0]
-        # Set variables to define last two points
-        end_pt = geompointlist[-1]
-        end_pt2 = geompointlist[-2]
-        # Calculate angle of end line segment
-        end_angle_and_dist = end_pt2.angleAndDistanceTo(end_pt, "PLANAR")
-        end_angle = end_angle_and_dist[0]
-        # Calculate new beginning and end points based on angle of segment and buffer distance
+        # Array of xsln vertex coordinates (one row of x, y per vertex)
+        pts = np.array([(vertex.X, vertex.Y) for vertex in line[0].getPart(0)])
+        # Extend first and last segments equal to buffer distance, in the direction of each segment
         # extending lines equal to buffer distance should capture all of the points
-        new_beg = beg_pt.pointFromAngleAndDistance(beg_angle, buffer_dist, method='PLANAR')
-        new_end = end_pt.pointFromAngleAndDistance(end_angle, buffer_dist, method='PLANAR')
-        # Change first and last coordinate values in geompointlist to use in creating temporary xsln file
-        geompointlist[0] = new_beg
-        geompointlist[-1] = new_end
-        # Turn geompointlist into point object list instead of point geometry objects
-        pointlist = []
-        for vertex in geompointlist:
-            newpt = vertex[0]
-            pointlist.append(newpt)
-        # Create arcpy array for writing geometry
-        xsln_array = arcpy.Array(pointlist)
-        # Turn array of point vertices into polyline object
+        # Repeated end vertices are skipped so the direction comes from the nearest distinct vertex
+        new_beg = extended_end_point(pts[0], pts[1:], buffer_dist)
+        new_end = extended_end_point(pts[-1], pts[-2::-1], buffer_dist)
+        if new_beg is None or new_end is None:
+            printit("Warning: cross section line {0} has zero length. Line was not extended.".format(et_id))
+        else:
+            pts[0] = new_beg
+            pts[-1] = new_end
+        # Create arcpy array of point vertices and turn it into polyline object
+        xsln_array = arcpy.Array([arcpy.Point(x, y) for x, y in pts])
         new_xsln_geometry = arcpy.Polyline(xsln_array, spatialref, True)
-        with arcpy.da.InsertCursor(xsln_temp, ['SHAPE@', xsln_etid_field]) as cursor:
-            # Create geometry and fill in field values
-            cursor.insertRow([new_xsln_geometry, et_id])
+        new_xsln_rows.append(([new_xsln_geometry, et_id], pts))
+
+# Write all extended lines to temp xsln file in one edit operation
+# Keep each extended line's OID and vertex array, keyed by et_id, for near analysis below
+xsln_geoms = {}
+with arcpy.da.Editor(workspace):
+    with arcpy.da.InsertCursor(xsln_temp, ['SHAPE@', xsln_etid_field]) as cursor:
+        for row, pts in new_xsln_rows:
+            xsln_geoms[row[1]] = (cursor.insertRow(row), pts)
 
 #%% 13 Populate near analysis fields in wwpt file
 # This is populating fields in wwpt file that are used later to create geometry
 arcpy.env.overwriteOutput = True
 starttime = datetime.datetime.now()
-# Loop through each xsln_temp and create a geometry object for each line
-with arcpy.da.SearchCursor(xsln_temp, ['SHAPE@', xsln_etid_field]) as xsln:
-    for line in xsln:
-        et_id = line[1]
-        pointlist = []
-        for vertex in line[0].getPart(0):
-            # Creates a polyline geometry object from xsln_temp vertex points.
-            # Necessary for near analysis
-            point = arcpy.Point(vertex.X, vertex.Y)
-            pointlist.append(point)
-        array = arcpy.Array(pointlist)
-        xsln_geometry = arcpy.Polyline(array)
-        # Create a new wwpt file with only points associated with current xsln
-        printit("Calculating well locations in cross section view for xsln {0} out of {1}.".format(et_id, xsln_count))
-        wwpt_by_xs_file = os.path.join(wwpt_by_xs_fd, "wwpt_{0}".format(et_id))
-        arcpy.analysis.Select(wwpt_file_temp, wwpt_by_xs_file, '"{0}" = \'{1}\''.format(wwpt_etid_field, et_id))
-        # Do near analysis on wwpt file to populate near x, near y, and near dist fields
-        # Near x and y are the coordinates of the point along the xsln that are closest to the well
-        # "dist" is the distance between the well and the nearest point on the line
-        arcpy.analysis.Near(wwpt_by_xs_file, xsln_geometry, '', 'LOCATION', '', 'PLANAR')
-        # Create update cursor object that defines values gathered in near analysis
-        with arcpy.da.UpdateCursor(wwpt_by_xs_file, ['OID@', 'NEAR_X', 'NEAR_Y', 'OnLine_DIST']) as wellpts:
-            for well in wellpts:
-                index = well[0]
-                x =  well[1]
-                y = well[2]
-                # Create point geometry object from nearest point on the xsln
-                point = arcpy.Point(x, y)
-                # Measure distance from start of xsln geometry object to defined point
-                # This is the "OnLine_DIST" which turns into 2d x coordinate after vertical exaggeration calculation
-                n = arcpy.Polyline.measureOnLine(xsln_geometry, point)
-                #subtract extended line distance so points before start nodes will have negative values
-                well[3] = n - buffer_dist
-                # Update field values in wwpt table to track near x, y, and OnLine dist
-                wellpts.updateRow(well)
+# Each well is measured against its own xsln (matching et_id) from xsln_geoms, not the nearest xsln
+# Read well coordinates and et_ids
+wwpt_xy = arcpy.da.FeatureClassToNumPyArray(wwpt_file_temp, ['OID@', 'SHAPE@X', 'SHAPE@Y', wwpt_etid_field],
+                                            null_value={wwpt_etid_field: ''})
+
+printit("Calculating well locations in cross section view for {0} xslns.".format(xsln_count))
+# Calculate near fid, near dist, near x, near y, and OnLine dist for all wells on each xsln at once
+# Near x and y are the coordinates of the point along the xsln that are closest to the well
+# "dist" is the distance between the well and the nearest point on the line
+# "measure" is the distance from start of xsln to the near point
+# This is the "OnLine_DIST" which turns into 2d x coordinate after vertical exaggeration calculation
+near_values = {}
+for et_id, (xsln_oid, vertices) in xsln_geoms.items():
+    wells = wwpt_xy[wwpt_xy[wwpt_etid_field] == et_id]
+    if len(wells) == 0:
+        continue
+    near_x, near_y, near_dist, measure = near_point_on_line(vertices, wells['SHAPE@X'], wells['SHAPE@Y'])
+    #subtract extended line distance so points before start nodes will have negative values
+    online_dist = measure - buffer_dist
+    for oid, dist, x, y, n in zip(wells['OID@'].tolist(), near_dist.tolist(), near_x.tolist(),
+                                  near_y.tolist(), online_dist.tolist()):
+        near_values[oid] = [xsln_oid, dist, x, y, n]
+
+# Single pass over the wwpt file to write calculated values
+# Updates are made in one edit operation rather than committed row by row
+with arcpy.da.Editor(workspace):
+    with arcpy.da.UpdateCursor(wwpt_file_temp, ['OID@', 'NEAR_FID', 'NEAR_DIST',
+                                                'NEAR_X', 'NEAR_Y', 'OnLine_DIST']) as wellpts:
+        for well in wellpts:
+            if well[0] not in near_values:
+                # well has no matching xsln, remove it from the temporary file so it is not plotted
+                wellpts.deleteRow()
+                continue
+            # Update field values in wwpt table to track near x, y, and OnLine dist
+            wellpts.updateRow([well[0]] + near_values[well[0]])
 
 endtime = datetime.datetime.now()
 elapsed = endtime - starttime
 printit('Near analysis and line measuring completed at {0}. Elapsed time: {1}'.format(endtime, elapsed))
 
-#%% 14 Delete wwpt_temp from feature dataset
-arcpy.management.Delete(wwpt_file_temp)
+# wwpt_temp now holds every well with its cross section location calculated
+wwpt_merge = wwpt_file_temp
 
-#%% 15 Merge together wwpt by xs files into one file
-arcpy.env.workspace = wwpt_by_xs_fd
-wwpt_list = arcpy.ListFeatureClasses()
-printit("Creating mapview well point file with cross section locations calculated.")
-wwpt_list_paths = []
-for file in wwpt_list:
-    path = os.path.join(wwpt_by_xs_fd, file)
-    wwpt_list_paths.append(path)
 
-wwpt_merge = os.path.join(workspace, "wwpt_merge")
-arcpy.management.Merge(wwpt_list_paths, wwpt_merge)
-
-
-#%%16 Create 2d well point geometry from merged wwpt file
+#%% 14 Create 2d well point geometry from temporary wwpt file
 starttime = datetime.datetime.now()
 printit('2D point geometry creation started at {0}'.format(starttime))
 
-with arcpy.da.SearchCursor(wwpt_merge, ['OID@', wwpt_wellid_field, wwpt_etid_field,
-                                        'NEAR_DIST', 'SHAPE@X', 'SHAPE@Y', 'OnLine_DIST','elevation','meas_elev','measuremt','BUFF_DIST','VE','Data_Source']) as wwpt:
-    for well in wwpt:
-        index = well[0]
-        wellid = well[1]
-        et_id = well[2]
-        #mn_etid_int = int(mn_et_id)
-        dist = well[3] #NEAR_DIST field
-        pct_dist = dist / buffer_dist * 200 #percent distance
-        real_x = well[4] #true x coordinate of well
-        real_y = well[5] #true y coordinate of well
-        well_z = well[7] #well sfc elevation
-        if well_z == None:
-            printit("Error: Well number {0} is null in ""dem"" (surface elevation) field. Skipping.".format(wellid))
-            continue
-        swl_z = well[8]  #swl elevation
-        if swl_z == None:
-            printit("Error: Well number {0} is null in ""meas_elev"" field. Skipping.".format(wellid))
-            continue
-        x_coord_meters = well[6]
-        x_coord_feet = (int(x_coord_meters))/0.3048
-        x_coord_2d = x_coord_feet/vertical_exaggeration
-        y_coord_2d = swl_z
-        dtw = well[9] #depth to water a.k.a measuremt
-        buff_dist = buffer_dist
-        vert_ex = vertical_exaggeration
-        data_source = well[12]
-        index_int = int(index)
-        if index_int % 5000 == 0: #Print statement every 5000th well to track progress
-            printit('Working on well number {0} out of {1}'.format(index, wwpt_count))
-
-        point_geometry = arcpy.Point(x_coord_2d, y_coord_2d)
-
-        with arcpy.da.InsertCursor(pointfile, ['SHAPE@', wwpt_wellid_field, wwpt_etid_field,'x_coord',
-                                               'y_coord', 'x_coord_2d','y_coord_2d','distance', 'elevation', 'meas_elev', 'pct_dist','measuremt','BUFF_DIST','VE','Data_Source']) as cursor:
-            # Create geometry and fill in field values, saving true coordinates in attribute
-            cursor.insertRow([point_geometry, wellid, et_id, real_x, real_y, x_coord_2d, y_coord_2d, dist, well_z, swl_z, pct_dist, dtw, buff_dist, vert_ex, data_source])
+# Find wells with no well id, numpy arrays cannot hold a null well id
+# so these are read with a placeholder id and written with a null id below
+with arcpy.da.SearchCursor(wwpt_merge, ['OID@'], "{0} IS NULL".format(wwpt_wellid_field)) as null_wells:
+    null_wellid_oids = [well[0] for well in null_wells]
+
+# Read all merged well points into a numpy array, null elevations are read as NaN
+# and null data sources as empty text
+wwpt_array = arcpy.da.FeatureClassToNumPyArray(wwpt_merge, ['OID@', wwpt_wellid_field, wwpt_etid_field, 'OnLine_DIST',
+                                                            'elevation', 'meas_elev', 'measuremt', 'Data_Source'],
+                                               null_value={wwpt_wellid_field: 0 if wellid_is_numeric else '',
+                                                           'elevation': np.nan, 'meas_elev': np.nan, 'measuremt': np.nan,
+                                                           'Data_Source': ''})
+null_wellid = np.isin(wwpt_array['OID@'], null_wellid_oids)
+# Well ids for messages, with null well ids shown as None
+wellid_report = np.where(null_wellid, None, wwpt_array[wwpt_wellid_field])
+
+# Skip wells with no surface elevation or swl elevation
+null_elev = np.isnan(wwpt_array['elevation'])
+if null_elev.any():
+    printit("Error: {0} wells are null in ""elevation"" (surface elevation) field. Skipping. Well numbers are: {1}"
+            .format(null_elev.sum(), wellid_report[null_elev].tolist()))
+null_swl = np.isnan(wwpt_array['meas_elev']) & ~null_elev
+if null_swl.any():
+    printit("Error: {0} wells are null in ""meas_elev"" field. Skipping. Well numbers are: {1}"
+            .format(null_swl.sum(), wellid_report[null_swl].tolist()))
+wwpt_array = wwpt_array[~(null_elev | null_swl)]
+null_wellid = null_wellid[~(null_elev | null_swl)]
+printit('Creating 2D points for {0} wells out of {1}.'.format(len(wwpt_array), wwpt_count))
+
+# Build numpy data types matching the 2d point file fields.
+# Text fields with a length in the field list (et_id) keep that length,
+# other text fields keep the width of the well point field they are copied from.
+numpy_field_types = {'DOUBLE': 'f8', 'FLOAT': 'f4'}
+text_field_sources = {wwpt_wellid_field: wwpt_wellid_field, xsln_etid_field: wwpt_etid_field, 'Data_Source': 'Data_Source'}
+point_dtype = []
+for newfield in point_2d_fields:
+    if newfield[1] == 'TEXT' and len(newfield) > 3:
+        point_dtype.append((newfield[0], 'U{0}'.format(newfield[3])))
+    elif newfield[1] == 'TEXT':
+        point_dtype.append((newfield[0], wwpt_array.dtype[text_field_sources[newfield[0]]]))
+    else:
+        point_dtype.append((newfield[0], numpy_field_types[newfield[1]]))
+point_dtype.append(('XY', 'f8', 2)) # 2d point geometry
+etid_length = fields_base[1][3]
+if len(wwpt_array) > 0 and np.char.str_len(wwpt_array[wwpt_etid_field].astype(str)).max() > etid_length:
+    printit("Warning: some et_id's are longer than {0} characters and will be shortened in the 2d point file.".format(etid_length))
+
+# Calculate 2d coordinates and fill in field values for all wells at once
+point_array = np.zeros(len(wwpt_array), dtype=point_dtype)
+point_array[wwpt_wellid_field] = wwpt_array[wwpt_wellid_field]
+point_array[xsln_etid_field] = wwpt_array[wwpt_etid_field]
+#Divide distance along line by vertical exaggeration to squish x axis for vertical exaggeration
+point_array['XY'][:, 0] = wwpt_array['OnLine_DIST'] / 0.3048 / vertical_exaggeration
+point_array['XY'][:, 1] = wwpt_array['meas_elev'] #swl elevation
+point_array['meas_elev'] = wwpt_array['meas_elev']
+point_array['measuremt'] = wwpt_array['measuremt'] #depth to water
+point_array['elevation'] = wwpt_array['elevation'] #well sfc elevation
+point_array['BUFF_DIST'] = buffer_dist
+point_array['VE'] = vertical_exaggeration
+point_array['Data_Source'] = wwpt_array['Data_Source']
+
+# Write 2d point file with one bulk insert
+printit("Creating 2d point file to show well locations.")
+arcpy.da.NumPyArrayToFeatureClass(point_array[~null_wellid], pointfile, ['XY'])
+
+# Add wells with no well id, writing a null well id in place of the placeholder
+if null_wellid.any():
+    point_fields = ['SHAPE@XY' if name == 'XY' else name for name in point_array.dtype.names]
+    wellid_index = point_fields.index(wwpt_wellid_field)
+    with arcpy.da.InsertCursor(pointfile, point_fields) as cursor:
+        for well in point_array[null_wellid].tolist():
+            well = list(well)
+            well[wellid_index] = None
+            well[-1] = tuple(well[-1]) # SHAPE@XY is the last field
+            cursor.insertRow(well)
 
 endtime = datetime.datetime.now()
 elapsed = endtime - starttime
 printit('2D point geometry completed at {0}. Elapsed time: {1}'.format(endtime, elapsed))
 
-pt_file_copy1= arcpy.management.DeleteField(pointfile,['x_coord',
-                                               'y_coord', 'x_coord_2d','y_coord_2d','distance','pct_dist'])[0]
-                               
 # # make copy of unprojected 2D pt file
 pointfile_copy = os.path.join(workspace, "swl_2d_xsecview_prj")
-arcpy.management.CopyFeatures(pt_file_copy1, pointfile_copy)
+arcpy.management.CopyFeatures(pointfile, pointfile_copy)
 
 # #%% Defining 2D coordinate system for output feature class
 arcpy.management.DefineProjection(pointfile_copy, spatialref_2d)
 
-#%% 17 Delete temporary files/fields
+#%% 15 Delete temporary files/fields
 
 printit("Deleting temporary files from output geodatabase.")
 try:
-    arcpy.management.Delete(wwpt_by_xs_fd)
     arcpy.management.Delete(wwpt_merge)
     arcpy.management.Delete(xsln_temp)
 except:
     printit("Warning: unable to delete all temporary files.")
 
-#%% 18 Record and print tool end time
+#%% 16 Record and print tool end time
 toolend = datetime.datetime.now()
 toolelapsed = toolend - toolstart
 printit('Create 2D SWL Points tool completed at {0}. Elapsed time: {1}. You did it!'.format(toolend, toolelapsed))
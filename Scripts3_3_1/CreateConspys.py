@@ -23,6 +23,9 @@ import arcpy
 import os
 import sys
 import datetime
+import functools
+import numpy as np
+from collections import defaultdict
 
 #%% 2 Define functions
 
@@ -43,15 +46,69 @@ def printerror(message):
     else:
         print(message)
 
+# Define field name lookup, cached so each dataset's fields are only listed once.
+# Only use on datasets whose fields are not changed after the first lookup.
+
+@functools.lru_cache(maxsize=None)
+def _field_name_set(dataset):
+    return frozenset(field.name for field in arcpy.ListFields(dataset))
+
+# Define near point function
+# For each well (x, y arrays) find the closest point on a polyline (array of x, y vertices).
+# Returns near x, near y, distance from well to line, and distance along line to near point.
+
+def near_point_on_line(vertices, x, y):
+    seg_start = vertices[:-1]
+    seg = vertices[1:] - seg_start
+    seg_len = np.hypot(seg[:, 0], seg[:, 1])
+    cum_len = np.concatenate(([0], np.cumsum(seg_len)))
+    # Projection of each well (rows) onto each segment (columns), clipped to the segment ends
+    dx = x[:, None] - seg_start[:, 0]
+    dy = y[:, None] - seg_start[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (dx * seg[:, 0] + dy * seg[:, 1]) / seg_len**2
+    t = np.clip(np.nan_to_num(t), 0, 1) #zero length segments project to their start point
+    px = seg_start[:, 0] + t * seg[:, 0]
+    py = seg_start[:, 1] + t * seg[:, 1]
+    # Keep the segment with the minimum distance to each well
+    dist = np.hypot(x[:, None] - px, y[:, None] - py)
+    nearest = np.argmin(dist, axis=1)
+    rows = np.arange(len(x))
+    measure = cum_len[nearest] + t[rows, nearest] * seg_len[nearest]
+    return px[rows, nearest], py[rows, nearest], dist[rows, nearest], measure
+
+# Define line end extension function
+# Moves an end vertex (x, y array) out by distance, in the direction from the nearest
+# distinct vertex in others (rows of x, y, nearest first) to the end vertex.
+# Returns None if every vertex is at the end vertex (zero length line).
+
+def extended_end_point(end, others, distance):
+    offsets = end - others
+    lengths = np.hypot(offsets[:, 0], offsets[:, 1])
+    distinct = np.flatnonzero(lengths > 0)
+    if len(distinct) == 0:
+        return None
+    nearest = distinct[0]
+    return end + offsets[nearest] / lengths[nearest] * distance
+
 # Define field exists function
 
 def FieldExists(dataset, field_name):
-    if field_name in [field.name for field in arcpy.ListFields(dataset)]:
+    if field_name in _field_name_set(dataset):
         return True
     else:
         printerror("Error: {0} field does not exist in {1}."
                 .format(field_name, os.path.basename(dataset)))
 
+# Define empty dataset check function
+# Stops at the first row instead of counting every row
+
+def is_empty(dataset):
+    with arcpy.da.SearchCursor(dataset, ['OID@']) as cursor:
+        for row in cursor:
+            return False
+    return True
+
 # %% 3 Set parameters to work in testing and compiled geopocessing tool
 
 if (len(sys.argv) > 1):
@@ -84,6 +141,8 @@ else:
     vertical_exaggeration = 50
     printit("Variables set with hard-coded parameters for testing.")
 
+# Workspace for intermediate files, so they are not written to the output gdb
+TMP = "memory"
 
 #%% 4  Set 3d spatial reference based on xsln file
 
@@ -117,28 +176,20 @@ if multipart:
 
 #determine if  input tables have the correct matching fields (function defined above)
 printit("Checking that data tables have correct fields.")
-FieldExists(conspy_table, "elev_top")
-FieldExists(conspy_table, "elev_bot")
 FieldExists(conspy_table, "OBJECTID") # does this need to be "C5c2_seq_no" instead?
 #FieldExists(wwpt_file_orig, "ELEVATION")
 
 #%% 6 Data QC
-# Count number of rows in input parameters
-conspy_count_result = arcpy.management.GetCount(conspy_table)
-conspy_count = int(conspy_count_result[0])
-if conspy_count == 0:
+# Check that input parameters are not empty
+if is_empty(conspy_table):
     printerror("Error: construction table is empty.")
     raise SystemExit
 
-wwpt_count_result = arcpy.management.GetCount(wwpt_file_orig)
-wwpt_count = int(wwpt_count_result[0])
-if wwpt_count == 0:
+if is_empty(wwpt_file_orig):
     printerror("Error: well location point file is empty.")
     raise SystemExit
 
-xsln_count_result = arcpy.management.GetCount(xsln_file_orig)
-xsln_count = int(xsln_count_result[0])
-if xsln_count == 0:
+if is_empty(xsln_file_orig):
     printerror("Error: cross section line file is empty.")
     raise SystemExit
 
@@ -146,84 +197,69 @@ if xsln_count == 0:
 
 printit("Checking that construction table, well point file, and cross section line file all match.")
 
-# Create empty lists to store well IDs and et_ids in each file
-conspy_wellid_list = []
-wwpt_wellid_list = []
-wwpt_etid_list = []
-xsln_etid_list = []
+# Create empty sets to store unique well IDs and et_ids in each file
+conspy_wellids = set()
+wwpt_wellids = set()
+wwpt_etids = set()
+xsln_etids = set()
+# First non-null well id read from each file, used to check well id data types
+conspy_wellid_sample = None
+wwpt_wellid_sample = None
 
-# Populate construction table wellid and et_id lists
+# Populate construction table wellid set
 
 #with arcpy.da.SearchCursor(conspy_table, [conspy_wellid_field, conspy_etid_field]) as conspy_records:
 with arcpy.da.SearchCursor(conspy_table, [conspy_wellid_field]) as conspy_records:
     for row in conspy_records:
-        wellid = row[0]
-        if wellid not in conspy_wellid_list:
-            conspy_wellid_list.append(wellid)
+        conspy_wellids.add(row[0])
+        if conspy_wellid_sample is None:
+            conspy_wellid_sample = row[0]
 
-# Populate well point file wellid and et_id lists
+# Populate well point file wellid and et_id sets
 with arcpy.da.SearchCursor(wwpt_file_orig, [wwpt_wellid_field, wwpt_etid_field]) as wwpt_records:
     for row in wwpt_records:
-        wellid = row[0]
-        etid = row[1]
-        if wellid not in wwpt_wellid_list:
-            wwpt_wellid_list.append(wellid)
-        if etid not in wwpt_etid_list:
-            wwpt_etid_list.append(etid)
-
-# Populate cross section line et_id list
+        wwpt_wellids.add(row[0])
+        wwpt_etids.add(row[1])
+        if wwpt_wellid_sample is None:
+            wwpt_wellid_sample = row[0]
+
+# Populate cross section line et_id set
 with arcpy.da.SearchCursor(xsln_file_orig, [xsln_etid_field]) as xsln_records:
     for line in xsln_records:
-        etid = line[0]
-        if etid not in xsln_etid_list:
-            xsln_etid_list.append(etid)
+        xsln_etids.add(line[0])
 
 # Print warning if conspy record(s) have no matching well point(s).
-listprint = []
-for wellid in conspy_wellid_list:
-    if wellid not in wwpt_wellid_list:
-        listprint.append(wellid)
+listprint = list(conspy_wellids - wwpt_wellids)
 listprint_len = len(listprint)
 if listprint_len > 0:
     printit("Warning: {0} construction records have no matching well points. Well stick diagrams will not draw for these records.".format(listprint_len))
 
 # Print warning if well point(s) have no matching construction records.
-listprint = []
-for wellid in wwpt_wellid_list:
-    if wellid not in conspy_wellid_list:
-        listprint.append(wellid)
+listprint = list(wwpt_wellids - conspy_wellids)
 listprint_len = len(listprint)
 if listprint_len > 0:
     printit("Warning: {0} well points have no matching construction records. Well stick diagrams will not draw for these wells.".format(listprint_len))
 
 # Check that et_id fields in well point file have matching xsln et_id
-listprint = []
-for etid in wwpt_etid_list:
-    if etid not in xsln_etid_list:
-        listprint.append(etid)
+listprint = sorted(wwpt_etids - xsln_etids, key=str)
 listprint_len = len(listprint)
 if listprint_len > 0:
         printit("Warning: there are {0} et_id's in well point file that do not match any et_id's in cross section line file. Well point et_id's are: {1}".format(listprint_len, listprint))
 
 # Check that all cross section lines have matching well points
-listprint = []
-for etid in xsln_etid_list:
-    if etid not in wwpt_etid_list:
-        listprint.append(etid)
+listprint = sorted(xsln_etids - wwpt_etids, key=str)
 listprint_len = len(listprint)
 if listprint_len > 0:
         printit("Warning: there are {0} cross section lines that do not have any associated well points. Cross section et_id's are: {1}".format(listprint_len, listprint))
 
 # Check that well id in conspy and well point files have the same data type
-if type(conspy_wellid_list[0]) != type(wwpt_wellid_list[0]):
+if type(conspy_wellid_sample) != type(wwpt_wellid_sample):
     printerror("Warning: conspy table and well point file have mismatched data types in the well id field. Wells and construction records will not be matched correctly.")
 
-# Set boolean variable that stores data type of well id field (needed for defining Where Clause later)
-wellid_is_numeric = True
-if type(conspy_wellid_list[0]) == str:
-    wellid_is_numeric = False
+# Set boolean variable that stores data type of well id field (needed for defining well id field type later)
+wellid_is_numeric = not isinstance(conspy_wellid_sample, str)
 
-# %% 8 List fields that are used in 3d line, 2d line, and 2d point
+# %% 8 List fields that are used in 3d polyline and 2d polygon files
 
 # set field type of well id so code correctly handles text vs. numeric
 if wellid_is_numeric:
@@ -231,15 +267,52 @@ if wellid_is_numeric:
 elif not wellid_is_numeric:
     well_id_field_type = 'TEXT'
 
-# fields needed in all output files
+# well id, et_id, and true coordinate fields needed in 3d polyline file
 fields_base = [[conspy_wellid_field, well_id_field_type], [xsln_etid_field, 'TEXT', '', 3],
                ['x_coord', 'DOUBLE'], ['y_coord', 'DOUBLE']]
 
-# fields needed in polyline/polygon output files (both 2d and 3d versions)
+# construction record fields needed in 3d polyline file
 fields_conspy = [['conspy_oid', 'DOUBLE'], ['z_top', 'DOUBLE'], ['z_bot', 'DOUBLE']]
 
-# fields only needed in 2d files (point, polyline, and polygon)
-fields_2d = [['distance', 'FLOAT'], ['pct_dist', 'FLOAT'],['BUFF_DIST','DOUBLE'],['VE','DOUBLE']]
+# 3d polyline fields kept on the 2d polygon file (well id and et_id), plus vertical exaggeration
+fields_2d = fields_base[:2] + [['VE','DOUBLE']]
+
+# construction fields copied to 2d polygon file: every field except system fields (OID, geometry, global id),
+# fields already in the 2d polygon file (such as the well id field), and fields not needed in the polygon file
+join_field_types = {'String': 'TEXT', 'Double': 'DOUBLE', 'Single': 'FLOAT', 'Integer': 'LONG',
+                    'SmallInteger': 'SHORT', 'BigInteger': 'BIGINTEGER', 'Date': 'DATE', 'DateOnly': 'DATEONLY',
+                    'TimeOnly': 'TIMEONLY', 'TimestampOffset': 'TIMESTAMPOFFSET', 'Guid': 'GUID', 'Blob': 'BLOB'}
+system_field_types = {'OID', 'Geometry', 'GlobalID'}
+skip_join_fields = {field[0].lower() for field in fields_2d} | {'conspy_oid', 'x_coord', 'y_coord', 'distance', 'pct_dist',
+                    'z_top', 'z_bot', 'c5c2_seq_no', 'relateid_1', 'county_c', 'xsec_id_1', 'buff_dist', 'xsec_desc', 'dem'}
+conspy_field_list = arcpy.ListFields(conspy_table)
+join_fields = [field for field in conspy_field_list
+               if field.type in join_field_types and field.name.lower() not in skip_join_fields]
+join_field_names = tuple(field.name for field in join_fields)
+# Fields of other types (such as raster) cannot be read by a cursor and copied
+unsupported_fields = [field.name for field in conspy_field_list
+                      if field.type not in join_field_types and field.type not in system_field_types]
+if len(unsupported_fields) > 0:
+    printit("Warning: construction fields {0} have a field type that cannot be copied. These fields were skipped in the 2d polygon file.".format(unsupported_fields))
+
+# conspy fields read when creating geometry: construction fields copied to the 2d polygon file,
+# then elev_top and elev_bot if they are not copied (field names are matched ignoring case)
+conspy_table_fields = {name.lower(): name for name in _field_name_set(conspy_table)}
+conspy_fields = ('OID@', conspy_wellid_field) + join_field_names
+join_attributes_end = len(conspy_fields)
+for elev_field in ('elev_top', 'elev_bot'):
+    if elev_field not in conspy_table_fields:
+        printerror("Error: {0} field does not exist in {1}.".format(elev_field, os.path.basename(conspy_table)))
+        raise SystemExit
+    if elev_field not in [name.lower() for name in join_field_names]:
+        conspy_fields += (conspy_table_fields[elev_field],)
+conspy_field_names_lower = [name.lower() for name in conspy_fields]
+z_top_index = conspy_field_names_lower.index('elev_top')
+z_bot_index = conspy_field_names_lower.index('elev_bot')
+
+# fields written by the 3d polyline and 2d polygon insert cursors, in insert row order
+insert_fields_3d = ('SHAPE@', conspy_wellid_field, xsln_etid_field, 'x_coord', 'y_coord', 'z_top', 'z_bot', 'conspy_oid')
+insert_fields_2d = ('SHAPE@', conspy_wellid_field, xsln_etid_field, 'VE') + join_field_names
 
 
 # %% 9 Create empty 3d polyline file
@@ -247,10 +320,10 @@ fields_2d = [['distance', 'FLOAT'], ['pct_dist', 'FLOAT'],['BUFF_DIST','DOUBLE']
 arcpy.env.overwriteOutput = True
 #create polyline shapefile with 3d geometry enabled, spatial ref matches xsln file
 printit("Creating empty 3d polyline file for well stick diagrams.")
-arcpy.management.CreateFeatureclass(workspace, "conspys_3d", "POLYLINE", '','DISABLED', 'ENABLED', spatialref)
+arcpy.management.CreateFeatureclass(TMP, "conspys_3d", "POLYLINE", '','DISABLED', 'ENABLED', spatialref)
 
 #set polyline shapefile filepath variable
-polylinefile_3d = os.path.join(workspace, "conspys_3d")
+polylinefile_3d = os.path.join(TMP, "conspys_3d")
 
 #define field names and types: base fields and construction fields
 polyline_3d_fields = fields_base + fields_conspy
@@ -258,34 +331,37 @@ polyline_3d_fields = fields_base + fields_conspy
 # Add fields to 3D polyline file
 arcpy.management.AddFields(polylinefile_3d, polyline_3d_fields)
 
-# %% 10 Create empty 2d polyline file
+# %% 10 Create empty 2d polygon file
 
 arcpy.env.overwriteOutput = True
-#create polyline shapefile, spatial ref defined above
-printit("Creating empty 2d polyline file for well stick diagrams.")
-arcpy.management.CreateFeatureclass(workspace, "conspys_2d_line", "POLYLINE", '',
+#create polygon feature class, 2d spatial ref is defined on the projected copy at the end
+printit("Creating empty 2d polygon file for well stick diagrams.")
+arcpy.management.CreateFeatureclass(workspace, "conspys_2d_poly", "POLYGON", '',
                                     'DISABLED', 'DISABLED')
 
-#set polyline shapefile filepath variable
-polylinefile_2d = os.path.join(workspace, "conspys_2d_line")
+#set polygon file filepath variable
+polygon_file = os.path.join(workspace, "conspys_2d_poly")
 
-#define field names and types: base fields, construction fields, and 2d fields
-polyline_2d_fields = fields_base + fields_conspy + fields_2d
+#define field names and types: 2d fields and construction fields copied from conspy table
+polygon_2d_fields = fields_2d + [[field.name, join_field_types[field.type], field.aliasName,
+                                  field.length if field.type == 'String' else ''] for field in join_fields]
 
-#Add fields to 2D polyline file
-arcpy.management.AddFields(polylinefile_2d, polyline_2d_fields)
+#Add fields to 2D polygon file
+arcpy.management.AddFields(polygon_file, polygon_2d_fields)
 
-#%% 11 Create feature dataset to store wwpt files by xs
-# wwpt files need to be split by xs to ensure that each well is referencing the correct xsln
-arcpy.env.overwriteOutput = True
-printit("Creating feature dataset for temporary file storage and copying well point file.")
-arcpy.management.CreateFeatureDataset(workspace, "wwpt_by_xs")
-wwpt_by_xs_fd = os.path.join(workspace, "wwpt_by_xs")
+# Set half width of polygon proportional to vertical exaggeration
+#bufferdist = (vertical_exaggeration * 0.15) + 40
+#bufferdist = ((vertical_exaggeration *0.15) + 40)/0.3048/vertical_exaggeration
+#bufferdist = (131.2/vertical_exaggeration) + 0.492
+#bufferdist = (130/vertical_exaggeration) + 0.5
+bufferdist = (130/vertical_exaggeration) + well_stick_width
 
-# Make a temporary copy of the wwpt file and put it in the new feature dataset
-# Code below will grab selected features from this temporary wwpt file.
+#%% 11 Make a temporary copy of the wwpt file
+# Code below will populate cross section location fields in this temporary wwpt file.
 # The temporary file will be deleted when geometry is completed.
-wwpt_file_temp = os.path.join(wwpt_by_xs_fd, "wwpt_temp")
+arcpy.env.overwriteOutput = True
+printit("Copying well point file for temporary file storage.")
+wwpt_file_temp = os.path.join(TMP, "wwpt_temp")
 arcpy.management.CopyFeatures(wwpt_file_orig, wwpt_file_temp)
 
 #%% 12 Add fields to temporary wwpt point feature class
@@ -294,19 +370,21 @@ arcpy.management.CopyFeatures(wwpt_file_orig, wwpt_file_temp)
 wwpt_fields = [["NEAR_FID", "LONG"], ["NEAR_DIST", "DOUBLE"], ["NEAR_X", "DOUBLE"],
                ["NEAR_Y", "DOUBLE"], ["OnLine_DIST", "FLOAT"],["VE","DOUBLE"]]
 
+existing_fields = _field_name_set(wwpt_file_temp)
 for newfield in wwpt_fields:
-    if newfield[0] in [field.name for field in arcpy.ListFields(wwpt_file_temp)]:
+    if newfield[0] in existing_fields:
         printit("{0} field already exists in well point file. Tool will overwrite data in this field.".format(newfield[0]))
-    else:
-        printit("Adding {0} field to well point file.".format(newfield[0]))
-        arcpy.management.AddField(wwpt_file_temp, newfield[0], newfield[1])
+to_add = [newfield for newfield in wwpt_fields if newfield[0] not in existing_fields]
+if to_add:
+    printit("Adding {0} fields to well point file.".format(", ".join(newfield[0] for newfield in to_add)))
+    arcpy.management.AddFields(wwpt_file_temp, to_add)
 
 #%% 13 Create a temporary xsln file and extend the lines equal to buffer distance
     # The extended xsln file is used to define 2d x coordinates of wells
     # to ensure that wells beyond the xsln plot correctly
 # Create temporary xsln file (empty for now)
-xsln_temp = os.path.join(workspace, "xsln_temp")
-arcpy.management.CreateFeatureclass(workspace, "xsln_temp", "POLYLINE", '', 'DISABLED', 'DISABLED', spatialref)
+xsln_temp = os.path.join(TMP, "xsln_temp")
+arcpy.management.CreateFeatureclass(TMP, "xsln_temp", "POLYLINE", '', 'DISABLED', 'DISABLED', spatialref)
 
 # add et_id and mn_et_id fields to temp xsln file
 arcpy.management.AddField(xsln_temp, xsln_etid_field, "TEXT")
@@ -316,247 +394,189 @@ printit("Creating temporary xsln file to ensure wells beyond xsln endpoints plot
 # Temp xsln file will have the first and last segments extended equal to xsln spacing
 # This is to ensure that near analysis function will find the correct point for
 # wells beyond the from and to nodes of the cross section line.
+# The extended vertex arrays are kept, keyed by et_id, for the near analysis in section 14.
 
-with arcpy.da.SearchCursor(xsln_file_orig, ['SHAPE@', xsln_etid_field]) as xsln:
+xsln_geoms = {}
+with arcpy.da.InsertCursor(xsln_temp, ['SHAPE@', xsln_etid_field]) as cursor, \
+     arcpy.da.SearchCursor(xsln_file_orig, ['SHAPE@', xsln_etid_field]) as xsln:
     for line in xsln:
         et_id = line[1]
-        geompointlist = []
-        # Fill geompoint list with list of vertices in the xsln as point geometry objects
-        for vertex in line[0].getPart(0): #for each vertex in array of point objects
-            point = arcpy.PointGeometry(arcpy.Point(vertex.X, vertex.Y))
-            geompointlist.append(point)
-        # Set variables to define first two points
-        beg_pt = geompointlist[0]
-        beg_pt2 = geompointlist[1]
-        # Calculate angle of beginning line segment from second point to beginning
-        beg_angle_and_dist = beg_pt2.angleAndDistanceTo(beg_pt, "PLANAR")
-        beg_angle = beg_angle_and_dist[0]
-        # Set variables to define last two points
-        end_pt = geompointlist[-1]
-        end_pt2 = geompointlist[-2]
-        # Calculate angle of end line segment
-        end_angle_and_dist = end_pt2.angleAndDistanceTo(end_pt, "PLANAR")
-        end_angle = end_angle_and_dist[0]
-        # Calculate new beginning and end points based on angle of segment and buffer distance
+        # Array of xsln vertex coordinates (one row of x, y per vertex)
+        vertexlist = np.array([(vertex.X, vertex.Y) for vertex in line[0].getPart(0)])
+        # Calculate new beginning and end points by extending the first and last
+        # segments along their own direction by the buffer distance
         # extending lines equal to buffer distance should capture all of the points
-        new_beg = beg_pt.pointFromAngleAndDistance(beg_angle, buffer_dist, method='PLANAR')
-        new_end = end_pt.pointFromAngleAndDistance(end_angle, buffer_dist, method='PLANAR')
-        # Change first and last coordinate values in geompointlist to use in creating temporary xsln file
-        geompointlist[0] = new_beg
-        geompointlist[-1] = new_end
-        # Turn geompointlist into point object list instead of point geometry objects
-        pointlist = []
-        for vertex in geompointlist:
-            newpt = vertex[0]
-            pointlist.append(newpt)
+        # Repeated end vertices are skipped so the direction comes from the nearest distinct vertex
+        new_beg = extended_end_point(vertexlist[0], vertexlist[1:], buffer_dist)
+        new_end = extended_end_point(vertexlist[-1], vertexlist[-2::-1], buffer_dist)
+        if new_beg is None or new_end is None:
+            printit("Warning: cross section line {0} has zero length. Line was not extended.".format(et_id))
+        else:
+            vertexlist[0] = new_beg
+            vertexlist[-1] = new_end
         # Create arcpy array for writing geometry
-        xsln_array = arcpy.Array(pointlist)
+        xsln_array = arcpy.Array([arcpy.Point(x, y) for x, y in vertexlist])
         # Turn array of point vertices into polyline object
         new_xsln_geometry = arcpy.Polyline(xsln_array, spatialref, True)
-        with arcpy.da.InsertCursor(xsln_temp, ['SHAPE@', xsln_etid_field]) as cursor:
-            # Create geometry and fill in field values
-            cursor.insertRow([new_xsln_geometry, et_id])
+        # Create geometry and fill in field values, keeping the new xsln object id
+        xsln_geoms[et_id] = (cursor.insertRow([new_xsln_geometry, et_id]), vertexlist)
 
 #%% 14 Populate near analysis fields in wwpt file
 # This is populating fields in wwpt file that are used later to create geometry
 arcpy.env.overwriteOutput = True
 starttime = datetime.datetime.now()
-# Loop through each xsln_temp and create a geometry object for each line
-with arcpy.da.SearchCursor(xsln_temp, ['SHAPE@', xsln_etid_field]) as xsln:
-    for line in xsln:
-        et_id = line[1]
-        pointlist = []
-        for vertex in line[0].getPart(0):
-            # Creates a polyline geometry object from xsln_temp vertex points.
-            # Necessary for near analysis
-            point = arcpy.Point(vertex.X, vertex.Y)
-            pointlist.append(point)
-        array = arcpy.Array(pointlist)
-        xsln_geometry = arcpy.Polyline(array)
-        # Create a new wwpt file with only points associated with current xsln
-        printit("Calculating well locations in cross section view for xsln {0} out of {1}.".format(et_id, xsln_count))
-        wwpt_by_xs_file = os.path.join(wwpt_by_xs_fd, "wwpt_{0}".format(et_id))
-        arcpy.analysis.Select(wwpt_file_temp, wwpt_by_xs_file, '"{0}" = \'{1}\''.format(wwpt_etid_field, et_id))
-        # Do near analysis on wwpt file to populate near x, near y, and near dist fields
-        # Near x and y are the coordinates of the point along the xsln that are closest to the well
-        # "dist" is the distance between the well and the nearest point on the line
-        arcpy.analysis.Near(wwpt_by_xs_file, xsln_geometry, '', 'LOCATION', '', 'PLANAR')
-        # Create update cursor object that defines values gathered in near analysis
-        with arcpy.da.UpdateCursor(wwpt_by_xs_file, ['OID@', 'NEAR_X', 'NEAR_Y', 'OnLine_DIST']) as wellpts:
-            for well in wellpts:
-                index = well[0]
-                x =  well[1]
-                y = well[2]
-                # Create point geometry object from nearest point on the xsln
-                point = arcpy.Point(x, y)
-                # Measure distance from start of xsln geometry object to defined point
-                # This is the "OnLine_DIST" which turns into 2d x coordinate after vertical exaggeration calculation
-                n = arcpy.Polyline.measureOnLine(xsln_geometry, point)
-                #subtract extended line distance so points before start nodes will have negative values
-                well[3] = n - buffer_dist
-                # Update field values in wwpt table to track near x, y, and OnLine dist
-                wellpts.updateRow(well)
+# Each well is measured against its own xsln (matching et_id in xsln_geoms), not the nearest xsln
+
+# Read well coordinates and et_ids
+wwpt_xy = arcpy.da.FeatureClassToNumPyArray(wwpt_file_temp, ['OID@', 'SHAPE@X', 'SHAPE@Y', wwpt_etid_field],
+                                            null_value={wwpt_etid_field: ''})
+
+printit("Calculating well locations in cross section view for {0} xslns.".format(len(xsln_geoms)))
+# Calculate near fid, near dist, near x, near y, and OnLine dist for all wells on each xsln at once
+# Near x and y are the coordinates of the point along the xsln that are closest to the well
+# "dist" is the distance between the well and the nearest point on the line
+# "measure" is the distance from start of xsln to the near point
+# This is the "OnLine_DIST" which turns into 2d x coordinate after vertical exaggeration calculation
+near_values = {}
+for et_id, (xsln_oid, vertices) in xsln_geoms.items():
+    wells = wwpt_xy[wwpt_xy[wwpt_etid_field] == et_id]
+    if len(wells) == 0:
+        continue
+    near_x, near_y, near_dist, measure = near_point_on_line(vertices, wells['SHAPE@X'], wells['SHAPE@Y'])
+    #subtract extended line distance so points before start nodes will have negative values
+    online_dist = measure - buffer_dist
+    for oid, dist, x, y, n in zip(wells['OID@'].tolist(), near_dist.tolist(), near_x.tolist(),
+                                  near_y.tolist(), online_dist.tolist()):
+        near_values[oid] = [xsln_oid, dist, x, y, n]
+
+# Single pass over the wwpt file to write calculated values
+with arcpy.da.UpdateCursor(wwpt_file_temp, ['OID@', 'NEAR_FID', 'NEAR_DIST',
+                                            'NEAR_X', 'NEAR_Y', 'OnLine_DIST']) as wellpts:
+    for well in wellpts:
+        if well[0] not in near_values:
+            # well has no matching xsln, remove it from the temporary file so it is not plotted
+            wellpts.deleteRow()
+            continue
+        # Update field values in wwpt table to track near x, y, and OnLine dist
+        wellpts.updateRow([well[0]] + near_values[well[0]])
 
 endtime = datetime.datetime.now()
 elapsed = endtime - starttime
 printit('Near analysis and line measuring completed at {0}. Elapsed time: {1}'.format(endtime, elapsed))
 
-#%% 15 Delete wwpt_temp from feature dataset
-
-arcpy.management.Delete(wwpt_file_temp)
-
-#%% 16 Merge together wwpt by xs files into one file
+# wwpt_temp now holds every well with its cross section location calculated
+wwpt_merge = wwpt_file_temp
 
-arcpy.env.workspace = wwpt_by_xs_fd
-wwpt_list = arcpy.ListFeatureClasses()
-printit("Creating mapview well point file with cross section locations calculated.")
-wwpt_list_paths = []
-for file in wwpt_list:
-    path = os.path.join(wwpt_by_xs_fd, file)
-    wwpt_list_paths.append(path)
-
-wwpt_merge = os.path.join(workspace, "wwpt_merge")
-arcpy.management.Merge(wwpt_list_paths, wwpt_merge)
-
-#%% 17 Create 3D and 2D polyline geometry from conspy and wwpt tables
+#%% 15 Create 3D polyline and 2D polygon geometry from conspy and wwpt tables
 starttime = datetime.datetime.now()
-printit('Polyline geometry creation started at {0}'.format(starttime))
+printit('Polyline and polygon geometry creation started at {0}'.format(starttime))
 nomatch_list = [] #list to store well id's from the conspy table with no matching well point
 
-# Define variables in search cursor object
-with arcpy.da.SearchCursor(conspy_table, ['OID@', conspy_wellid_field, 'elev_top',
-                                         'elev_bot']) as conspy_records:
+# Read every well point once and calculate 2d x coordinates for all wells at once
+wwpt_array = arcpy.da.FeatureClassToNumPyArray(wwpt_merge, ['SHAPE@X', 'SHAPE@Y', 'OnLine_DIST',
+                                                            wwpt_wellid_field, wwpt_etid_field], skip_nulls=True)
+#Divide distance along line by vertical exaggeration to squish x axis for vertical exaggeration
+x_coord_meters = wwpt_array['OnLine_DIST'].astype('f8')
+x_coord_feet = x_coord_meters/0.3048
+x_coord_array = x_coord_feet/vertical_exaggeration
+
+# Lookup keyed by well id of (true x, true y, 2d x, et_id)
+# If a well id appears more than once, the last well point read is used
+well_lookup = dict(zip(wwpt_array[wwpt_wellid_field].tolist(),
+                       zip(wwpt_array['SHAPE@X'].tolist(), wwpt_array['SHAPE@Y'].tolist(), x_coord_array.tolist(),
+                           wwpt_array[wwpt_etid_field].tolist())))
+
+# Where clause pieces for the elev_top and elev_bot fields as they are named in the conspy table
+elev_top_sql = arcpy.AddFieldDelimiters(conspy_table, conspy_table_fields['elev_top'])
+elev_bot_sql = arcpy.AddFieldDelimiters(conspy_table, conspy_table_fields['elev_bot'])
+
+# Count conspy records with no top or bottom elevation, these are skipped
+with arcpy.da.SearchCursor(conspy_table, ['OID@'], "{0} IS NULL OR {1} IS NULL".format(elev_top_sql, elev_bot_sql)) as conspy_records:
+    null_elev_count = sum(1 for row in conspy_records)
+if null_elev_count > 0:
+    printit("Error: {0} conspy records have no value in elev_top or elev_bot field. Skipping.".format(null_elev_count))
+
+# Group conspy records by well id in a single pass over the conspy table
+# Each record keeps its true elevations and the construction fields copied to the 2d polygon file
+conspy_by_well = defaultdict(list)
+with arcpy.da.SearchCursor(conspy_table, conspy_fields,
+                           "{0} IS NOT NULL AND {1} IS NOT NULL".format(elev_top_sql, elev_bot_sql)) as conspy_records:
     for row in conspy_records:
-        conspy_oid = row[0]
-        wellid = row[1]
-        real_z_top = row[2] #true elevation
-        real_z_bot = row[3] #true elevation
-        if real_z_top == None:
-            printit("Error: Conspy record number {0} has no value in elev_top field. Skipping.".format(conspy_oid))
-            continue
-        if real_z_bot == None:
-            printit("Error: Conspy record number {0} has no value in elev_bot field. Skipping.".format(conspy_oid))
-            continue
-
-        # Define two where_clauses for wwpt file query to handle numeric or text
-        where_clause = "{0}={1}".format(wwpt_wellid_field, wellid) #where clause for numeric data type (default)
-        if not wellid_is_numeric:
-            where_clause = "{0}='{1}'".format(wwpt_wellid_field, wellid) #redefine where clause for string data type
-        index_int = int(conspy_oid)
-        if index_int % 1000 == 0: #print statement every 1000th record to track progress
-            printit('Working on creating polylines for conspy record number {0} out of {1}'.format(conspy_oid, conspy_count))
+        conspy_by_well[row[1]].append((row[0], row[z_top_index], row[z_bot_index], row[2:join_attributes_end]))
+
+# Create insert cursor objects to write geometry once for all conspy records
+# Wells are written in well id order (so that ArcGIS draws them in the correct order)
+with arcpy.da.InsertCursor(polylinefile_3d, insert_fields_3d) as cursor3d, \
+     arcpy.da.InsertCursor(polygon_file, insert_fields_2d) as cursor2d:
+    well_total = len(conspy_by_well)
+    for well_count, wellid in enumerate(sorted(conspy_by_well, key=lambda w: (w is not None, w))):
+        if well_count % 1000 == 0: #print statement every 1000th well to track progress
+            printit('Working on creating polylines and polygons for well number {0} out of {1}'.format(well_count, well_total))
+        records = conspy_by_well[wellid]
 
         # Find well location that matches conspy record well id and get coordinates and et_id information
-        with arcpy.da.SearchCursor(wwpt_merge, ['SHAPE@X', 'SHAPE@Y', 'OnLine_DIST', 'NEAR_DIST', wwpt_etid_field,'BUFF_DIST','VE'], where_clause) as wwpt:
-            i = 0 #index used to track if there are any well points that match the conspy record
-            for well in wwpt:
-                i += 1
-                # Define x and y coordinate variables
-                real_x = well[0] # true well coordinate
-                real_y = well[1] # true well coordinate
-                #Divide distance along line by vertical exaggeration to squish x axis for vertical exaggeration
-                x_coord_meters = well[2]
-                x_coord_feet = x_coord_meters/0.3048
-                x_coord = x_coord_feet/vertical_exaggeration
-                dist = well[3] # distance from xsln
-                pct_dist = dist / buffer_dist * 200 #percent distance
-                et_id = well[4]
-                buffer_distance = buffer_dist
-                vert_ex = vertical_exaggeration
-
-            if i == 0: #if there is no matching well point, move to the next conspy record
-                nomatch_list.append(wellid)
-                continue
-        # Create 2 point objects (top and bottom, in true coordinates) from x, y, and z coordinates
-        real_pointA = arcpy.Point(real_x, real_y, real_z_top)
-        real_pointB = arcpy.Point(real_x, real_y, real_z_bot)
-        real_pointlist = [real_pointA, real_pointB]
-        real_array = arcpy.Array(real_pointlist)
-        # Turn 2 point objects into endpoints of a polyline segment
-        real_polyline_geometry = arcpy.Polyline(real_array, spatialref, True)
-        # Create insert cursor object to write geometry
-        with arcpy.da.InsertCursor(polylinefile_3d, ['SHAPE@', conspy_wellid_field, xsln_etid_field, 'x_coord',
-                                                     'y_coord', 'z_top', 'z_bot', 'conspy_oid']) as cursor3d:
+        hit = well_lookup.get(wellid)
+        if hit is None: #if there is no matching well point, move to the next well
+            nomatch_list.extend([wellid] * len(records))
+            continue
+        # Define x and y coordinate variables
+        real_x = hit[0] # true well coordinate
+        real_y = hit[1] # true well coordinate
+        x_coord = hit[2]
+        x_left = x_coord - bufferdist # 2d polygon edges
+        x_right = x_coord + bufferdist
+        et_id = hit[3]
+        vert_ex = vertical_exaggeration
+
+        for conspy_oid, real_z_top, real_z_bot, conspy_attributes in records:
+            # Create 2 point objects (top and bottom, in true coordinates) from x, y, and z coordinates
+            real_pointA = arcpy.Point(real_x, real_y, real_z_top)
+            real_pointB = arcpy.Point(real_x, real_y, real_z_bot)
+            real_pointlist = [real_pointA, real_pointB]
+            real_array = arcpy.Array(real_pointlist)
+            # Turn 2 point objects into endpoints of a polyline segment
+            real_polyline_geometry = arcpy.Polyline(real_array, spatialref, True)
             # Create geometry and fill in field values
             cursor3d.insertRow([real_polyline_geometry, wellid, et_id, real_x, real_y, real_z_top, real_z_bot, conspy_oid])
 
-        # Create 2 point objects (top and bottom) from x and y coordinates for 2d geometry
-        pointA = arcpy.Point(x_coord, real_z_top)
-        pointB = arcpy.Point(x_coord, real_z_bot)
-        pointlist = [pointA, pointB]
-        array = arcpy.Array(pointlist)
-        # Turn 2 point objects into endpoints of a polyline segment
-        polyline_geometry = arcpy.Polyline(array)
-        # Create insert cursor object
-
-        with arcpy.da.InsertCursor(polylinefile_2d, ['SHAPE@', conspy_wellid_field, xsln_etid_field, 'x_coord',
-                                                     'y_coord','z_top', 'z_bot', 'conspy_oid', 'distance', 'pct_dist','BUFF_DIST','VE']) as cursor2d:
-            # Create geometry and fill in field values, saving true coordinates in attribute
-            cursor2d.insertRow([polyline_geometry, wellid, et_id, real_x, real_y,
-                                real_z_top, real_z_bot, conspy_oid, dist, pct_dist, buffer_distance,vert_ex])
+            # Create 4 corner points of a rectangle centered on the 2d x coordinate,
+            # running from bottom to top elevation, for 2d geometry
+            pointlist = [arcpy.Point(x_left, real_z_bot), arcpy.Point(x_left, real_z_top),
+                         arcpy.Point(x_right, real_z_top), arcpy.Point(x_right, real_z_bot)]
+            array = arcpy.Array(pointlist)
+            # Turn corner points into a polygon
+            polygon_geometry = arcpy.Polygon(array)
+            # Create geometry and fill in field values, including construction fields
+            cursor2d.insertRow((polygon_geometry, wellid, et_id, vert_ex) + conspy_attributes)
 
 endtime = datetime.datetime.now()
 elapsed = endtime - starttime
 if len(nomatch_list) > 0:
     printit("Could not find matching well point for {0} construction table records. These construction records were skipped.".format(len(nomatch_list)))
-printit('Polyline geometry completed at {0}. Elapsed time: {1}'.format(endtime, elapsed))
-
-#%% 18 Join construction fields to 2d polyline feature classes
-printit("Joining construction fields to 2d polyline file.")
-arcpy.management.JoinField(polylinefile_2d, 'conspy_oid', conspy_table, 'OBJECTID')
-
-
-#%% 19 Create 2d polygon conspy from 2d lines
-arcpy.env.overwriteOutput = True
-printit('Creating 2D conspy polygons from 2D lines.')
-
-# Set width of polygon proportional to vertical exaggeration
-#bufferdist = (vertical_exaggeration * 0.15) + 40
-#bufferdist = ((vertical_exaggeration *0.15) + 40)/0.3048/vertical_exaggeration
-#bufferdist = (131.2/vertical_exaggeration) + 0.492
-#bufferdist = (130/vertical_exaggeration) + 0.5
-bufferdist = (130/vertical_exaggeration) + well_stick_width
-
-# Set file path for new unsorted polygon file
-temp_polygon_file = os.path.join(workspace, 'conspys_2d_poly_temp')
-# Create polygon feature class using buffer tool
-arcpy.analysis.Buffer(polylinefile_2d, temp_polygon_file, bufferdist, '', 'FLAT', '', '', 'PLANAR')
-
-# Set file path for new sorted polygon file
-polygon_file = os.path.join(workspace, 'conspys_2d_poly')
-# Sort polygon feature by well id (so that ArcGIS draws them in the correct order)
-arcpy.management.Sort(temp_polygon_file, polygon_file, conspy_wellid_field)
-
-#%% 20 Clean polygon table
-#Copy polygon file and Delete extra Fields
-printit("Deleting extra fields from construction table copy.")
-polygonfile_copy = arcpy.management.DeleteField(polygon_file, ['conspy_oid','x_coord','y_coord', 'distance','pct_dist', 'z_top', 'z_bot',
-                                                        'c5c2_seq_no','relateid_1','county_c', 'xsec_id_1','BUFF_DIST','xsec_desc','dem','ORIG_FID','ORIG_FID_1'])[0]
+printit('Polyline and polygon geometry completed at {0}. Elapsed time: {1}'.format(endtime, elapsed))
 
+#%% 16 Copy 2d polygon file and define 2D coordinate system of the copy
 # # make copy of unprojected conspy poly file
 printit("Copying conspys_2d_poly.")
 polygon_file_copy1 = os.path.join(workspace, "conspy_2d_poly_prj")
-arcpy.management.CopyFeatures(polygonfile_copy, polygon_file_copy1)
+arcpy.management.CopyFeatures(polygon_file, polygon_file_copy1)
 
 # #%% Defining 2D coordinate system for output feature class
 arcpy.management.DefineProjection(polygon_file_copy1, spatialref_2d)
 printit('Create 2D conspy polygons completed.')
 
-#%% 21 Delete temporary files/fields
+#%% 17 Delete temporary files
 
-printit("Deleting temporary files from output geodatabase.")
+printit("Deleting temporary files from memory.")
 try:
     arcpy.management.Delete(xsln_temp)
-    arcpy.management.Delete(temp_polygon_file)
-    arcpy.management.Delete(wwpt_by_xs_fd)
     arcpy.management.Delete(wwpt_merge)
-    arcpy.management.Delete(polylinefile_2d)
     arcpy.management.Delete(polylinefile_3d)
 
 except:
     printit("Warning: unable to delete all temporary files.")
 
-#%% 22 Record and print tool end time
+#%% 18 Record and print tool end time
 toolend = datetime.datetime.now()
 toolelapsed = toolend - toolstart
 printit('Conspy tool completed at {0}. Elapsed time: {1}. You did it!'.format(toolend, toolelapsed))